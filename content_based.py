@@ -0,0 +1,246 @@
+import pandas as pd
+import numpy as np
+
+NON_GENRE_COLS = ['movie_id', 'title', 'release_date', 'release_year', 'release_month', 'release_day']
+
+# Popularity only breaks ties: two distinct Jaccard/overlap scores over <= 32 genres
+# differ by at least 1/(32*31), so a nudge below that never reorders them.
+TIE_BREAK_EPS = 1e-4
+
+
+def genre_columns(movies_df):
+    """Return the genre flag columns of a cleaned movies DataFrame, in file order."""
+    return [col for col in movies_df.columns if col not in NON_GENRE_COLS]
+
+
+def build_genre_index(movies_df, ratings_df=None):
+    """
+    Pack each movie's genre flags into a single uint32 bitmask.
+
+    Args:
+        movies_df: cleaned movies DataFrame (movie_id, title, release_date, genre flags).
+        ratings_df: optional ratings DataFrame. Ratings are grouped by user once here,
+            so per-user lookups never scan it again, and counted per movie so that
+            equally similar movies are ordered by popularity.
+
+    Returns:
+        dict with 'movie_ids' (sorted), 'titles', 'bits', 'genres', 'popularity'
+        and, when ratings are given, 'user_ids', 'user_offsets', 'rated_pos'
+        and 'rated_scores'.
+    """
+    genres = genre_columns(movies_df)
+    if len(genres) > 32:
+        raise ValueError(f"❗ Cannot pack {len(genres)} genres into a 32-bit mask.")
+
+    movies = movies_df.sort_values('movie_id')
+    flags = movies[genres].to_numpy(dtype=np.uint32)
+    weights = np.left_shift(np.uint32(1), np.arange(len(genres), dtype=np.uint32))
+    bits = (flags * weights).sum(axis=1, dtype=np.uint32)
+
+    movie_ids = movies['movie_id'].to_numpy()
+    index = {
+        "movie_ids": movie_ids,
+        "titles": movies['title'].to_numpy(),
+        "bits": bits,
+        "genres": genres,
+        "popularity": np.zeros(len(movie_ids)),
+    }
+    if ratings_df is not None:
+        index.update(_group_ratings(index, ratings_df))
+    return index
+
+
+def _group_ratings(index, ratings_df):
+    """CSR layout of ratings by user: user i rated rated_pos[user_offsets[i]:user_offsets[i + 1]]."""
+    # Dense lookup table from movie_id to index position; the last slot marks unknown ids.
+    lookup = np.full(index['movie_ids'].max() + 2, -1, dtype=np.int64)
+    lookup[index['movie_ids']] = np.arange(len(index['movie_ids']))
+    pos = lookup[np.clip(ratings_df['movie_id'].to_numpy(), 0, len(lookup) - 1)]
+    known = pos >= 0
+
+    users = ratings_df['user_id'].to_numpy()[known]
+    order = np.argsort(users)
+    users = users[order]
+    starts = np.flatnonzero(np.diff(users, prepend=users[:1] - 1))
+
+    popularity = np.bincount(pos[known], minlength=len(index['movie_ids'])).astype(np.float64)
+    return {
+        "popularity": popularity / (popularity.max() + 1),
+        "user_ids": users[starts],
+        "user_offsets": np.r_[starts, len(users)],
+        "rated_pos": pos[known][order],
+        "rated_scores": ratings_df['rating'].to_numpy()[known][order],
+    }
+
+
+def _user_ratings(index, user_id):
+    """Positions and scores of the movies a user rated (empty for unknown users)."""
+    if 'user_ids' not in index:
+        raise ValueError("❗ The genre index was built without ratings_df.")
+
+    i = np.searchsorted(index['user_ids'], user_id)
+    if i == len(index['user_ids']) or index['user_ids'][i] != user_id:
+        return index['rated_pos'][:0], index['rated_scores'][:0]
+
+    start, end = index['user_offsets'][i], index['user_offsets'][i + 1]
+    return index['rated_pos'][start:end], index['rated_scores'][start:end]
+
+
+def genre_mask(index, genres):
+    """Build a bitmask from a list of genre names, e.g. ['Action', 'Sci-Fi']."""
+    mask = 0
+    for genre in genres:
+        if genre not in index['genres']:
+            raise ValueError(f"❗ Unknown genre '{genre}'. Available: {', '.join(index['genres'])}")
+        mask |= 1 << index['genres'].index(genre)
+    return np.uint32(mask)
+
+
+def jaccard_similarity(mask, bits):
+    """|A & B| / |A | B| between one mask and every packed movie."""
+    inter = np.bitwise_count(bits & mask)
+    union = np.bitwise_count(bits | mask)
+    return np.divide(inter, union, out=np.zeros(len(bits)), where=union > 0)
+
+
+def overlap_similarity(mask, bits):
+    """|A & B| / min(|A|, |B|) between one mask and every packed movie."""
+    inter = np.bitwise_count(bits & mask)
+    smaller = np.minimum(np.bitwise_count(bits), np.bitwise_count(mask))
+    return np.divide(inter, smaller, out=np.zeros(len(bits)), where=smaller > 0)
+
+
+SIMILARITIES = {
+    'jaccard': jaccard_similarity,
+    'overlap': overlap_similarity,
+}
+
+
+def _similarity(metric):
+    if metric not in SIMILARITIES:
+        raise ValueError(f"❗ Unknown metric '{metric}'. Available: {', '.join(SIMILARITIES)}")
+    return SIMILARITIES[metric]
+
+
+def _top_n(index, scores, exclude, n):
+    keys = scores + TIE_BREAK_EPS * index['popularity']
+    keys[exclude] = -np.inf
+
+    n = min(n, int(np.count_nonzero(keys > -np.inf)))
+    if n == 0:
+        return []
+
+    top = np.argpartition(keys, -n)[-n:]
+    top = top[np.argsort(keys[top])[::-1]]
+    return [(index['titles'][i], float(scores[i])) for i in top]
+
+
+def _positions(index, movie_ids):
+    movie_ids = np.asarray(movie_ids)
+    pos = np.searchsorted(index['movie_ids'], movie_ids)
+    pos = np.clip(pos, 0, len(index['movie_ids']) - 1)
+    return pos[index['movie_ids'][pos] == movie_ids]
+
+
+def similar_movies(movie_id, index, n=10, metric='jaccard'):
+    """
+    Find the movies whose genres best match a given movie.
+
+    Works for movies nobody has rated yet, since only genre flags are used.
+
+    Returns:
+        A list of (title, similarity) tuples, most similar first.
+    """
+    similarity = _similarity(metric)
+    pos = _positions(index, [movie_id])
+    if len(pos) == 0:
+        raise ValueError(f"❗ Movie {movie_id} not found in the genre index.")
+
+    scores = similarity(index['bits'][pos[0]], index['bits'])
+    exclude = np.zeros(len(scores), dtype=bool)
+    exclude[pos[0]] = True
+    return _top_n(index, scores, exclude, n)
+
+
+def user_genre_profile(user_id, index, like_threshold=4, min_share=0.2):
+    """
+    Derive a genre bitmask from the movies a user has rated.
+
+    A genre is kept when it appears in at least `min_share` of the movies the user
+    rated `like_threshold` or higher. If the user liked nothing, all rated movies count.
+
+    Returns:
+        uint32 bitmask (0 for users with no ratings in the index).
+
+    Raises:
+        ValueError: if the index was built without ratings_df.
+    """
+    rated, scores = _user_ratings(index, user_id)
+    return _profile_mask(index, rated, scores, like_threshold, min_share)
+
+
+def _profile_mask(index, rated, scores, like_threshold=4, min_share=0.2):
+    pos = np.unique(rated[scores >= like_threshold])
+    if len(pos) == 0:
+        pos = np.unique(rated)
+    if len(pos) == 0:
+        return np.uint32(0)
+
+    shifts = np.arange(len(index['genres']), dtype=np.uint32)
+    counts = ((index['bits'][pos, None] >> shifts) & 1).sum(axis=0)
+    keep = counts >= min_share * len(pos)
+    return np.uint32(np.left_shift(np.uint32(1), shifts[keep]).sum())
+
+
+def recommend_movies_content(index, user_id=None, declared_genres=None, n=10, metric='jaccard'):
+    """
+    Recommend movies by genre similarity to a user's profile.
+
+    The profile combines genres learned from the user's ratings (if `user_id` is
+    given) with any `declared_genres`, so brand-new users can be served from
+    declared genres alone. Movies the user already rated are skipped.
+
+    Returns:
+        A list of (title, similarity) tuples, best first.
+
+    Raises:
+        ValueError: if `user_id` is given but the index was built without
+            ratings_df, or if `metric` or a declared genre is unknown.
+    """
+    similarity = _similarity(metric)
+    mask = np.uint32(0)
+    exclude = np.zeros(len(index['bits']), dtype=bool)
+
+    if user_id is not None:
+        rated, scores = _user_ratings(index, user_id)
+        mask |= _profile_mask(index, rated, scores)
+        exclude[rated] = True
+
+    if declared_genres:
+        mask |= genre_mask(index, declared_genres)
+
+    if mask == 0:
+        # Nothing known about the user: fall back to the most rated movies.
+        return _top_n(index, np.zeros(len(index['bits'])), exclude, n)
+
+    scores = similarity(mask, index['bits'])
+    return _top_n(index, scores, exclude, n)
+
+
+if __name__ == '__main__':
+    movies_df = pd.read_csv('clean_data/movies_clean.csv')
+    ratings_df = pd.read_csv('clean_data/ratings_clean.csv')
+
+    index = build_genre_index(movies_df, ratings_df)
+
+    print("\n🎬 Movies like movie 1:")
+    for movie, score in similar_movies(1, index, n=10):
+        print(f"{movie} (Similarity: {score:.2f})")
+
+    print("\n👤 Recommendations for user 42:")
+    for movie, score in recommend_movies_content(index, user_id=42, n=10):
+        print(f"Recommend: {movie} (Similarity: {score:.2f})")
+
+    print("\n🆕 Recommendations for a new user who likes Sci-Fi and Thriller:")
+    for movie, score in recommend_movies_content(index, declared_genres=['Sci-Fi', 'Thriller'], n=10):
+        print(f"Recommend: {movie} (Similarity: {score:.2f})")
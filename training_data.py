@@ -0,0 +1,290 @@
+import hashlib
+import json
+import os
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+# Bump when the feature layout changes so stale cached datasets are rebuilt.
+CACHE_VERSION = 1
+
+ID_COLS = ['user_id', 'movie_id']
+BOOL_PREFIXES = ('sex_', 'occupation_', 'age_group_')
+CATEGORICAL_PREFIXES = ('sex_', 'age_group_')
+DROP_COLS = ['title', 'rating', 'rating_date', 'release_date']
+
+DEFAULT_DATASET_PARAMS = {
+    'max_bin': 255,
+    'verbosity': -1,
+}
+
+
+def load_merged(path='merged_data/merged_dataset.csv'):
+    """
+    Read the merged ratings dataset with compact dtypes.
+
+    Ids are int32, the label float32, one-hot and genre flags 1 byte each, and
+    `release_date` is parsed once into year/month/day. The title is not loaded.
+    """
+    columns = pd.read_csv(path, nrows=0).columns
+
+    dtypes = {}
+    for col in columns:
+        if col in ID_COLS:
+            dtypes[col] = np.int32
+        elif col == 'rating':
+            dtypes[col] = np.float32
+        elif col == 'age':
+            dtypes[col] = np.int8
+        elif col.startswith(BOOL_PREFIXES):
+            dtypes[col] = bool
+        elif col not in ('title', 'release_date', 'rating_date'):
+            dtypes[col] = np.int8
+
+    df = pd.read_csv(
+        path,
+        usecols=[col for col in columns if col != 'title'],
+        dtype=dtypes,
+        parse_dates=['release_date', 'rating_date'],
+    )
+
+    df['release_year'] = df['release_date'].dt.year.astype(np.int16)
+    df['release_month'] = df['release_date'].dt.month.astype(np.int8)
+    df['release_day'] = df['release_date'].dt.day.astype(np.int8)
+    return df.drop(columns=['release_date'])
+
+
+def encode_ids(values, ids):
+    """Map raw ids to dense codes 0..len(ids)-1; ids not seen in training become -1 (missing)."""
+    values = np.asarray(values)
+    pos = np.clip(np.searchsorted(ids, values), 0, len(ids) - 1)
+    return np.where(ids[pos] == values, pos, -1).astype(np.int32)
+
+
+def feature_blocks(df, id_maps=None):
+    """
+    Build the compact model input from a `load_merged` frame.
+
+    Columns are grouped by their narrow dtype into separate 2-D blocks (int8
+    flags, int16 release year, int32 ids) instead of being widened to one
+    common dtype. user_id/movie_id are replaced by dense codes so LightGBM
+    does not allocate category bins for the whole raw id range.
+
+    Returns:
+        (feature_names, list of (column positions, block ndarray),
+        id_maps dict of sorted raw ids per id column)
+    """
+    feature_names = [col for col in df.columns if col not in DROP_COLS]
+
+    if id_maps is None:
+        id_maps = {col: np.unique(df[col].to_numpy()) for col in ID_COLS}
+
+    groups = {}
+    for j, col in enumerate(feature_names):
+        dtype = np.dtype(np.int32 if col in ID_COLS else df[col].dtype)
+        groups.setdefault(np.dtype(np.int8) if dtype == bool else dtype, []).append(j)
+
+    blocks = []
+    for dtype, positions in groups.items():
+        block = np.empty((len(df), len(positions)), dtype=dtype)
+        for k, j in enumerate(positions):
+            col = feature_names[j]
+            values = encode_ids(df[col], id_maps[col]) if col in ID_COLS else df[col].to_numpy()
+            block[:, k] = values
+        blocks.append((np.array(positions), block))
+    return feature_names, blocks, id_maps
+
+
+def categorical_features(feature_names):
+    return ID_COLS + [col for col in feature_names if col.startswith(CATEGORICAL_PREFIXES)]
+
+
+class FeatureSequence(lgb.Sequence):
+    """
+    Feed LightGBM float32 batches assembled from the narrow `feature_blocks`,
+    so no full-width matrix (integer or float) is held while the Dataset is
+    constructed.
+    """
+
+    def __init__(self, blocks, n_features, rows, batch_size=4096):
+        self.blocks = blocks
+        self.n_features = n_features
+        self.rows = rows
+        self.batch_size = batch_size
+
+    def __getitem__(self, idx):
+        rows = self.rows[idx]
+        if np.ndim(rows) == 0:
+            # Single rows are only requested for bin sampling, which LightGBM requires as doubles.
+            out = np.empty(self.n_features, dtype=np.float64)
+        else:
+            out = np.empty((len(rows), self.n_features), dtype=np.float32)
+
+        for positions, block in self.blocks:
+            out[..., positions] = block[rows]
+        return out
+
+    def __len__(self):
+        return len(self.rows)
+
+
+def split_rows(df, test_size=0.2, split='time', random_state=42):
+    """
+    Return (train_rows, valid_rows) positional indices.
+
+    split='time' keeps the most recent `test_size` share of ratings for validation;
+    split='random' reproduces the previous shuffled split.
+    """
+    if split == 'time':
+        order = np.argsort(df['rating_date'].to_numpy(), kind='stable')
+        cut = int(len(order) * (1 - test_size))
+        return order[:cut], order[cut:]
+    if split == 'random':
+        return train_test_split(np.arange(len(df)), test_size=test_size, random_state=random_state)
+    raise ValueError(f"❗ Unknown split '{split}'. Use 'time' or 'random'.")
+
+
+def cache_key(path, config):
+    """SHA-256 of the input file contents plus everything that affects the built Dataset."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    digest.update(json.dumps({'version': CACHE_VERSION, **config}, sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+
+def build_lgb_datasets(path='merged_data/merged_dataset.csv', cache_dir='cache/lgb',
+                       test_size=0.2, split='time', random_state=42, dataset_params=None):
+    """
+    Build (or load from cache) the LightGBM train/validation Datasets.
+
+    Constructed Datasets are saved in LightGBM's binary format under
+    `cache_dir/<key>`, where the key hashes the input file and the split and
+    binning settings. When nothing changed, the CSV is not parsed at all.
+
+    Returns:
+        (train Dataset, valid Dataset, meta dict with 'feature_names',
+        'categorical_features' and 'id_maps')
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f'Merged dataset not found at: {path}')
+
+    dataset_params = {**DEFAULT_DATASET_PARAMS, **(dataset_params or {})}
+    config = {
+        'test_size': test_size,
+        'split': split,
+        'random_state': random_state,
+        'dataset_params': dataset_params,
+    }
+    target = os.path.join(cache_dir, cache_key(path, config))
+    train_path = os.path.join(target, 'train.bin')
+    valid_path = os.path.join(target, 'valid.bin')
+    meta_path = os.path.join(target, 'meta.json')
+    ids_path = os.path.join(target, 'ids.npz')
+
+    # meta.json is written last, so its presence marks a complete cache entry.
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        with np.load(ids_path) as ids:
+            meta['id_maps'] = {col: ids[col] for col in ID_COLS}
+        train = lgb.Dataset(train_path, params=dataset_params)
+        valid = lgb.Dataset(valid_path, reference=train, params=dataset_params)
+        print(f"✅ Loaded cached LightGBM datasets from '{target}'.")
+        return train, valid, meta
+
+    df = load_merged(path)
+    label = df['rating'].to_numpy()
+    train_rows, valid_rows = split_rows(df, test_size, split, random_state)
+    feature_names, blocks, id_maps = feature_blocks(df)
+    del df
+
+    categorical = categorical_features(feature_names)
+
+    train = lgb.Dataset(
+        FeatureSequence(blocks, len(feature_names), train_rows),
+        label=label[train_rows],
+        feature_name=feature_names,
+        categorical_feature=categorical,
+        params=dataset_params,
+    )
+    valid = lgb.Dataset(
+        FeatureSequence(blocks, len(feature_names), valid_rows),
+        label=label[valid_rows],
+        feature_name=feature_names,
+        categorical_feature=categorical,
+        reference=train,
+        params=dataset_params,
+    )
+    train.construct()
+    valid.construct()
+
+    os.makedirs(target, exist_ok=True)
+    train.save_binary(train_path)
+    valid.save_binary(valid_path)
+    np.savez(ids_path, **id_maps)
+    meta = {'feature_names': feature_names, 'categorical_features': categorical}
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+    print(f"✅ Built LightGBM datasets and cached them in '{target}'.")
+
+    meta['id_maps'] = id_maps
+    return train, valid, meta
+
+
+def training_params(num_threads=None, **overrides):
+    """
+    LightGBM training parameters; num_threads defaults to 0 so OpenMP picks
+    the thread count (LightGBM recommends physical cores, not hyperthreads).
+
+    Row-wise histograms are forced, which suits tall, narrow rating data and
+    skips LightGBM's row/column-wise timing probe at the start of training.
+    """
+    params = {
+        'objective': 'regression',
+        'metric': 'rmse',
+        'verbosity': -1,
+        'num_threads': 0 if num_threads is None else num_threads,
+        'force_row_wise': True,
+    }
+    params.update(overrides)
+    return params
+
+
+def load_user(user_id, users_path='clean_data/users_clean.csv',
+              ratings_path='clean_data/ratings_clean.csv'):
+    """
+    Load what prediction needs for one user without touching the merged CSV.
+
+    Returns:
+        (user's row from users_clean.csv, array of movie ids the user has rated)
+    """
+    users = pd.read_csv(users_path)
+    user_row = users[users['user_id'] == user_id].iloc[0]
+
+    ratings = pd.read_csv(ratings_path, usecols=ID_COLS, dtype={col: np.int32 for col in ID_COLS})
+    rated_movie_ids = ratings.loc[ratings['user_id'] == user_id, 'movie_id'].unique()
+    return user_row, rated_movie_ids
+
+
+def candidate_features(user_id, user_row, movies_df, meta):
+    """
+    float32 feature matrix pairing one user with every movie in `movies_df`.
+
+    `user_row` holds the user's profile columns (see `load_user`) and
+    `movies_df` is a cleaned movies frame with release_year/month/day.
+    """
+    X = np.empty((len(movies_df), len(meta['feature_names'])), dtype=np.float32)
+
+    for j, col in enumerate(meta['feature_names']):
+        if col in ID_COLS:
+            source = movies_df['movie_id'] if col == 'movie_id' else np.full(len(movies_df), user_id)
+            X[:, j] = encode_ids(source, meta['id_maps'][col])
+        elif col in movies_df.columns:
+            X[:, j] = movies_df[col].to_numpy(dtype=np.float32)
+        else:
+            X[:, j] = np.float32(user_row[col])
+    return X